@@ -7,14 +7,43 @@ to assess risk/reward, and recommends trades to the Executor Agent.
 """
 
 import asyncio
-import json
+import functools
+import logging
+import multiprocessing
+import re
 import time
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
-import math
+import numpy as np
 
+import json_codec
 
-@dataclass
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; the kernel then runs as plain Python
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; only JSON frames can then be decoded
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+
+def _unpack_message(frame: bytes) -> Dict:
+    """Decode a Scanner Agent frame, msgpack or JSON"""
+    if frame[:1] == b"{" or msgpack is None:
+        return json_codec.loads(frame)
+    return msgpack.unpackb(frame)
+
+
+@dataclass(slots=True)
 class OpportunityAnalysis:
     market: str
     profit_margin: float
@@ -22,12 +51,152 @@ class OpportunityAnalysis:
     risk_score: float
     recommendation: str  # "EXECUTE", "SKIP", "MONITOR"
     bet_size: float
-    reasoning: List[str]
+    flags: int  # RULE_* bits for the rules that fired
+    
+    @property
+    def reasoning(self) -> List[str]:
+        """Human-readable reasoning for the rules that fired, built on demand"""
+        asset = _classify(self.market).upper()
+        reasoning = [
+            template.format(pm=self.profit_margin, conf=self.confidence, asset=asset)
+            for rule, template in REASON_TEMPLATES.items()
+            if self.flags & rule
+        ]
+        reasoning.append(f"Recommendation: {self.recommendation}")
+        return reasoning
+
+
+# Recommendation labels indexed by the codes produced by the scoring kernel
+RECOMMENDATIONS = ("SKIP", "MONITOR", "EXECUTE")
+
+# Rules that can fire during analysis
+RULE_MODERATE_PM = 1 << 0
+RULE_STRONG_PM = 1 << 1
+RULE_HIGH_PM = 1 << 2
+RULE_LOW_CONFIDENCE = 1 << 3
+RULE_HIGH_CONFIDENCE = 1 << 4
+RULE_STRONG_HISTORY = 1 << 5
+RULE_MODERATE_HISTORY = 1 << 6
+RULE_HIGH_VOLATILITY = 1 << 7
+
+# Reasoning for each rule, in the order it is reported
+REASON_TEMPLATES = {
+    RULE_MODERATE_PM: "Moderate profit margin ({pm:.1f}%)",
+    RULE_STRONG_PM: "Strong profit margin ({pm:.1f}%) detected",
+    RULE_HIGH_PM: "High profit margin ({pm:.1f}%) may indicate pricing error",
+    RULE_LOW_CONFIDENCE: "Low confidence ({conf:.1f}%) in opportunity",
+    RULE_HIGH_CONFIDENCE: "High confidence ({conf:.1f}%) in opportunity",
+    RULE_STRONG_HISTORY: "Strong historical accuracy for {asset} predictions",
+    RULE_MODERATE_HISTORY: "Moderate historical accuracy for {asset} predictions",
+    RULE_HIGH_VOLATILITY: "High crypto market volatility increases risk",
+}
+
+# Rule bits indexed by the profit margin and confidence tiers from the scoring kernel
+_PM_TIER_RULES = (RULE_MODERATE_PM, RULE_STRONG_PM, RULE_HIGH_PM)
+_CONFIDENCE_TIER_RULES = (0, RULE_LOW_CONFIDENCE, RULE_HIGH_CONFIDENCE)
+
+# Percentages are scaled to fractions by multiplying with this instead of dividing by 100
+_PERCENT = 0.01
+
+# Markets mentioning Bitcoin use BTC history; everything else falls back to ETH
+_BTC_RX = re.compile(r"bitcoin|btc", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=1024)
+def _classify(market: str) -> str:
+    """Map a market question to the asset type used by the historical rules"""
+    return "btc" if _BTC_RX.search(market) else "eth"
+
+
+# Source for the numeric core of the MeTTa rules. MeTTaReasoning fills in the
+# knowledge base constants as literals and compiles one specialized kernel per
+# engine. The kernel returns (risk_score, bet_size, recommendation code, profit
+# margin tier, confidence tier); codes index RECOMMENDATIONS and *_TIER_RULES.
+_SCORE_KERNEL_SOURCE = """
+def score_kernel(profit_margin, confidence, historical_adjustment):
+    risk_score = 0.0
+    
+    # Rule 1: Profit margin analysis
+    if profit_margin > {max_profit_margin!r}:
+        pm_tier = 2
+        risk_score += 30.0
+    elif profit_margin > 8.0:
+        pm_tier = 1
+        risk_score += 10.0
+    else:
+        pm_tier = 0
+    
+    # Rule 2: Confidence assessment
+    if confidence < {min_confidence!r}:
+        conf_tier = 1
+        risk_score += 25.0
+    elif confidence > 85.0:
+        conf_tier = 2
+        risk_score -= 10.0
+    else:
+        conf_tier = 0
+    
+    # Rule 3: Asset-specific historical performance
+    risk_score += historical_adjustment
+    
+    # Rule 4: Market volatility consideration
+    risk_score += {volatility_risk!r}
+    
+    # Rule 5: Generate recommendation
+    if profit_margin > 5.0 and confidence > 70.0 and risk_score < {max_risk_score!r}:
+        rec_code = 2
+    elif profit_margin > 3.0 and confidence > 60.0 and risk_score < 80.0:
+        rec_code = 1
+    else:
+        rec_code = 0
+    
+    # Rule 6: Calculate optimal bet size using modified Kelly Criterion
+    # f = (bp - q) / b where b = odds-1, p = win probability, q = 1-p
+    b = (1.0 + profit_margin * {percent!r}) - 1.0
+    p = confidence * {percent!r}
+    q = 1.0 - p
+    if b <= 0.0 or p <= 0.0:
+        bet_size = 0.0
+    else:
+        kelly_fraction = (b * p - q) / b
+        risk_adjustment = max(0.1, 1.0 - (risk_score * {percent!r}))
+        # Cap at 10% of bankroll for safety
+        bet_size = min(max(kelly_fraction * risk_adjustment, 0.0), 0.10)
+    
+    return risk_score, bet_size, rec_code, pm_tier, conf_tier
+"""
+
+
+def _compile_score_kernel(max_profit_margin: float, min_confidence: float,
+                          max_risk_score: float, crypto_volatility: float):
+    """Build a scoring kernel with the given constants folded in"""
+    source = _SCORE_KERNEL_SOURCE.format(
+        max_profit_margin=max_profit_margin,
+        min_confidence=min_confidence,
+        max_risk_score=max_risk_score,
+        volatility_risk=15.0 if crypto_volatility > 0.7 else 0.0,
+        percent=_PERCENT
+    )
+    namespace = {}
+    exec(compile(source, "<metta score kernel>", "exec"), namespace)
+    # Generated code has no source file, so Numba cannot cache it on disk
+    return njit()(namespace["score_kernel"])
 
 
 class MeTTaReasoning:
     """MeTTa-inspired reasoning engine for trade analysis"""
     
+    __slots__ = (
+        "knowledge_base",
+        "_max_pm",
+        "_min_conf",
+        "_max_risk",
+        "_crypto_vol",
+        "_historical_rules",
+        "_volatility_rule",
+        "_score_kernel",
+    )
+    
     def __init__(self):
         self.knowledge_base = {
             "market_patterns": {
@@ -45,161 +214,265 @@ class MeTTaReasoning:
                 "eth_predictions": {"accuracy": 0.68, "avg_margin": 3.8}
             }
         }
+        self.refresh_knowledge()
+    
+    def refresh_knowledge(self):
+        """Cache knowledge base constants used on the hot path
+        
+        Call again after mutating knowledge_base; this recompiles the scoring
+        kernel.
+        """
+        risk_params = self.knowledge_base["risk_parameters"]
+        self._max_pm = float(risk_params["max_profit_margin"])
+        self._min_conf = float(risk_params["min_confidence"])
+        self._max_risk = float(risk_params["max_risk_score"])
+        self._crypto_vol = float(self.knowledge_base["market_patterns"]["crypto_volatility"])
+        self._historical_rules = {
+            asset_type: self._historical_rule(asset_type) for asset_type in ("btc", "eth")
+        }
+        self._volatility_rule = RULE_HIGH_VOLATILITY if self._crypto_vol > 0.7 else 0
+        self._score_kernel = _compile_score_kernel(
+            self._max_pm, self._min_conf, self._max_risk, self._crypto_vol
+        )
     
     def analyze_opportunity(self, opportunity: Dict) -> OpportunityAnalysis:
         """Apply MeTTa reasoning to analyze opportunity"""
-        market = opportunity["market"]
-        profit_margin = opportunity["profit_margin"]
-        confidence = opportunity["confidence"]
+        analysis = OpportunityAnalysis(
+            market=opportunity["market"],
+            profit_margin=opportunity["profit_margin"],
+            confidence=opportunity["confidence"],
+            risk_score=0.0,
+            recommendation="SKIP",
+            bet_size=0.0,
+            flags=0
+        )
+        return self.update_in_place(analysis, analysis.confidence)
+    
+    def update_in_place(self, analysis: OpportunityAnalysis, new_confidence: float) -> OpportunityAnalysis:
+        """Re-score an existing analysis with a new confidence
+        
+        Overwrites the analysis fields rather than allocating a new analysis;
+        returns the same object.
+        """
+        asset_type = _classify(analysis.market)
+        
+        risk_score, bet_size, rec_code, pm_tier, conf_tier = self._score(
+            asset_type, analysis.profit_margin, new_confidence
+        )
         
-        reasoning = []
-        risk_score = 0.0
+        analysis.confidence = new_confidence
+        analysis.risk_score = risk_score
+        analysis.recommendation = RECOMMENDATIONS[rec_code]
+        analysis.bet_size = bet_size
+        analysis.flags = (
+            _PM_TIER_RULES[pm_tier]
+            | _CONFIDENCE_TIER_RULES[conf_tier]
+            | self._historical_rules[asset_type][1]
+            | self._volatility_rule
+        )
+        return analysis
+    
+    def analyze_batch(self, opportunities: List[Dict]) -> List[OpportunityAnalysis]:
+        """Apply MeTTa reasoning to a batch of opportunities in one vectorized pass
+        
+        Produces the same analyses as calling analyze_opportunity on each item,
+        in input order.
+        """
+        if not opportunities:
+            return []
+        
+        count = len(opportunities)
+        markets = [opp["market"] for opp in opportunities]
+        profit_margins = [opp["profit_margin"] for opp in opportunities]
+        confidences = [opp["confidence"] for opp in opportunities]
+        
+        pm = np.fromiter(profit_margins, np.float64, count)
+        conf = np.fromiter(confidences, np.float64, count)
         
         # Rule 1: Profit margin analysis
-        if profit_margin > self.knowledge_base["risk_parameters"]["max_profit_margin"]:
-            risk_score += 30
-            reasoning.append(f"High profit margin ({profit_margin:.1f}%) may indicate pricing error")
-        elif profit_margin > 8.0:
-            risk_score += 10
-            reasoning.append(f"Strong profit margin ({profit_margin:.1f}%) detected")
-        else:
-            reasoning.append(f"Moderate profit margin ({profit_margin:.1f}%)")
+        pm_tier = np.where(pm > self._max_pm, 2, np.where(pm > 8.0, 1, 0))
+        risk_score = np.choose(pm_tier, (0.0, 10.0, 30.0))
         
         # Rule 2: Confidence assessment
-        if confidence < self.knowledge_base["risk_parameters"]["min_confidence"]:
-            risk_score += 25
-            reasoning.append(f"Low confidence ({confidence:.1f}%) in opportunity")
-        elif confidence > 85:
-            risk_score -= 10
-            reasoning.append(f"High confidence ({confidence:.1f}%) in opportunity")
+        conf_tier = np.where(conf < self._min_conf, 1, np.where(conf > 85, 2, 0))
+        risk_score += np.choose(conf_tier, (0.0, 25.0, -10.0))
         
         # Rule 3: Asset-specific historical performance
-        asset_type = "btc" if "bitcoin" in market.lower() or "btc" in market.lower() else "eth"
-        if asset_type in self.knowledge_base["historical_performance"]:
-            hist_perf = self.knowledge_base["historical_performance"][f"{asset_type}_predictions"]
-            if hist_perf["accuracy"] > 0.7:
-                risk_score -= 5
-                reasoning.append(f"Strong historical accuracy for {asset_type.upper()} predictions")
-            else:
-                risk_score += 10
-                reasoning.append(f"Moderate historical accuracy for {asset_type.upper()} predictions")
+        historical = [self._historical_rules[_classify(market)] for market in markets]
+        risk_score += np.fromiter((adjustment for adjustment, _ in historical), np.float64, count)
         
         # Rule 4: Market volatility consideration
-        volatility = self.knowledge_base["market_patterns"]["crypto_volatility"]
-        if volatility > 0.7:
+        if self._volatility_rule:
             risk_score += 15
-            reasoning.append("High crypto market volatility increases risk")
         
         # Rule 5: Generate recommendation
-        recommendation = self._generate_recommendation(profit_margin, confidence, risk_score)
-        reasoning.append(f"Recommendation: {recommendation}")
+        rec_code = np.select(
+            [
+                (pm > 5.0) & (conf > 70.0) & (risk_score < self._max_risk),
+                (pm > 3.0) & (conf > 60.0) & (risk_score < 80.0),
+            ],
+            [2, 1],
+            default=0
+        )
         
         # Rule 6: Calculate optimal bet size using Kelly Criterion
-        bet_size = self._calculate_kelly_bet_size(profit_margin, confidence, risk_score)
+        b = (1 + pm * _PERCENT) - 1
+        p = conf * _PERCENT
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kelly_fraction = (b * p - (1 - p)) / b
+        risk_adjustment = np.maximum(0.1, 1.0 - risk_score * _PERCENT)
+        bet_size = np.minimum(np.maximum(kelly_fraction * risk_adjustment, 0.0), 0.10)
+        bet_size = np.where((b > 0) & (p > 0), bet_size, 0.0)
         
-        return OpportunityAnalysis(
-            market=market,
-            profit_margin=profit_margin,
-            confidence=confidence,
-            risk_score=risk_score,
-            recommendation=recommendation,
-            bet_size=bet_size,
-            reasoning=reasoning
+        flags = (
+            np.choose(pm_tier, _PM_TIER_RULES)
+            | np.choose(conf_tier, _CONFIDENCE_TIER_RULES)
+            | np.fromiter((rule for _, rule in historical), np.int64, count)
+            | self._volatility_rule
         )
-    
-    def _generate_recommendation(self, profit_margin: float, confidence: float, risk_score: float) -> str:
-        """Generate trading recommendation based on MeTTa rules"""
-        
-        # MeTTa-style logical rules
-        if (profit_margin > 5.0 and 
-            confidence > 70.0 and 
-            risk_score < self.knowledge_base["risk_parameters"]["max_risk_score"]):
-            return "EXECUTE"
         
-        elif (profit_margin > 3.0 and 
-              confidence > 60.0 and 
-              risk_score < 80.0):
-            return "MONITOR"
-        
-        else:
-            return "SKIP"
+        return [
+            OpportunityAnalysis(
+                market=market,
+                profit_margin=profit_margin,
+                confidence=confidence,
+                risk_score=risk,
+                recommendation=RECOMMENDATIONS[rec],
+                bet_size=bet,
+                flags=rules
+            )
+            for market, profit_margin, confidence, risk, bet, rec, rules in zip(
+                markets, profit_margins, confidences, risk_score.tolist(),
+                bet_size.tolist(), rec_code.tolist(), flags.tolist()
+            )
+        ]
     
-    def _calculate_kelly_bet_size(self, profit_margin: float, confidence: float, risk_score: float) -> float:
-        """Calculate optimal bet size using modified Kelly Criterion"""
-        
-        # Convert confidence to probability
-        win_probability = confidence / 100.0
-        
-        # Convert profit margin to odds
-        odds = 1 + (profit_margin / 100.0)
-        
-        # Kelly fraction: f = (bp - q) / b
-        # where b = odds-1, p = win_probability, q = 1-p
-        b = odds - 1
-        p = win_probability
-        q = 1 - p
-        
-        if b <= 0 or p <= 0:
-            return 0.0
-        
-        kelly_fraction = (b * p - q) / b
-        
-        # Apply risk adjustment
-        risk_adjustment = max(0.1, 1.0 - (risk_score / 100.0))
-        adjusted_fraction = kelly_fraction * risk_adjustment
+    def _score(self, asset_type: str, profit_margin: float, confidence: float) -> Tuple[float, float, int, int, int]:
+        """Run the scoring kernel for an asset type"""
+        return self._score_kernel(
+            float(profit_margin), float(confidence), self._historical_rules[asset_type][0]
+        )
+    
+    def _historical_rule(self, asset_type: str) -> Tuple[float, int]:
+        """Risk adjustment and rule bit from historical performance for an asset"""
+        historical = self.knowledge_base["historical_performance"]
+        if asset_type not in historical:
+            return 0.0, 0
         
-        # Cap at 10% of bankroll for safety
-        return min(max(adjusted_fraction, 0.0), 0.10)
+        hist_perf = historical[f"{asset_type}_predictions"]
+        if hist_perf["accuracy"] > 0.7:
+            return -5.0, RULE_STRONG_HISTORY
+        return 10.0, RULE_MODERATE_HISTORY
+
+
+# Messages with more opportunities than this are analyzed in a worker process
+_PROCESS_POOL_THRESHOLD = 16
+
+# Per-process engine used by _analyze_all, built on first use
+_worker_engine: Optional[MeTTaReasoning] = None
+
+
+def _analyze_all(opportunities: List[Dict], knowledge_base: Dict) -> List[OpportunityAnalysis]:
+    """Analyze opportunities in a worker process with the caller's knowledge base"""
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = MeTTaReasoning()
+    if _worker_engine.knowledge_base != knowledge_base:
+        _worker_engine.knowledge_base = knowledge_base
+        _worker_engine.refresh_knowledge()
+    return _worker_engine.analyze_batch(opportunities)
 
 
 class AnalyzerAgent:
     def __init__(self, agent_address: str):
         self.agent_address = agent_address
         self.metta_engine = MeTTaReasoning()
+        # Pay the scoring kernel's JIT compile cost before the first real analysis
+        self.metta_engine.analyze_opportunity({"market": "", "profit_margin": 0.0, "confidence": 0.0})
         self.executor_agent_address = "agent1q_executor_address_here"
         self.scanner_agent_address = "agent1q_scanner_address_here"
-        self.pending_opportunities = []
+        # Oldest MONITOR analyses are dropped once the cap is reached
+        self.pending_opportunities: Deque[OpportunityAnalysis] = deque(maxlen=512)
+        # Large batches are analyzed off the event loop; the pool is created on first use
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Static part of every trade recommendation message, without its closing brace
+        self._rec_header = json_codec.dumps({"type": "trade_recommendation", "from": self.agent_address})[:-1]
         
     async def start_analyzing(self):
         """Main analysis loop"""
         print(f"Analyzer Agent {self.agent_address} starting...")
         
-        while True:
-            try:
-                # In production, listen for messages from Scanner Agent
-                # For demo, simulate receiving opportunities
-                await self.process_pending_opportunities()
-                await asyncio.sleep(10)  # Check every 10 seconds
-                
-            except Exception as e:
-                print(f"Error in analysis loop: {e}")
-                await asyncio.sleep(5)
+        try:
+            while True:
+                try:
+                    # In production, listen for messages from Scanner Agent
+                    # For demo, simulate receiving opportunities
+                    await self.process_pending_opportunities()
+                    await asyncio.sleep(10)  # Check every 10 seconds
+                    
+                except Exception as e:
+                    print(f"Error in analysis loop: {e}")
+                    await asyncio.sleep(5)
+        finally:
+            await self.aclose()
+    
+    async def aclose(self):
+        """Shut down the analysis worker processes"""
+        if self._pool is not None:
+            # Joining the workers blocks, so do it off the event loop
+            await asyncio.to_thread(self._pool.shutdown, wait=True, cancel_futures=True)
+            self._pool = None
     
-    async def receive_opportunities(self, message: Dict):
-        """Receive opportunities from Scanner Agent"""
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Return the analysis process pool, creating it on first use"""
+        if self._pool is None:
+            # Workers start after thread pools and the event loop exist, so never fork them
+            self._pool = ProcessPoolExecutor(
+                max_workers=4, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return self._pool
+    
+    async def receive_opportunities(self, message: Union[Dict, bytes]):
+        """Receive opportunities from Scanner Agent, as a dict or an encoded frame"""
         try:
+            if isinstance(message, (bytes, bytearray)):
+                message = _unpack_message(message)
+            
             if message.get("type") == "opportunities_detected":
                 opportunities = message.get("opportunities", [])
+                
+                # Frames carry opportunities as rows in the order given by "fields"
+                columns = message.get("fields")
+                if columns:
+                    opportunities = [dict(zip(columns, row)) for row in opportunities]
                 print(f"Received {len(opportunities)} opportunities from Scanner")
                 
-                for opp in opportunities:
-                    analysis = self.metta_engine.analyze_opportunity(opp)
-                    
+                if len(opportunities) > _PROCESS_POOL_THRESHOLD:
+                    analyses = await asyncio.get_running_loop().run_in_executor(
+                        self._get_pool(), _analyze_all, opportunities, self.metta_engine.knowledge_base
+                    )
+                else:
+                    analyses = self.metta_engine.analyze_batch(opportunities)
+                
+                for analysis in analyses:
                     if analysis.recommendation == "EXECUTE":
                         await self.send_trade_recommendation(analysis)
                     elif analysis.recommendation == "MONITOR":
                         self.pending_opportunities.append(analysis)
                     
                     # Log reasoning
-                    print(f"\n--- Analysis for {analysis.market} ---")
-                    print(f"Profit: {analysis.profit_margin:.2f}%")
-                    print(f"Confidence: {analysis.confidence:.1f}%")
-                    print(f"Risk Score: {analysis.risk_score:.1f}")
-                    print(f"Recommendation: {analysis.recommendation}")
-                    print(f"Bet Size: {analysis.bet_size:.2%}")
-                    print("Reasoning:")
-                    for reason in analysis.reasoning:
-                        print(f"  - {reason}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(
+                            "Analysis for %s: profit %.2f%%, confidence %.1f%%, risk score %.1f, "
+                            "recommendation %s, bet size %.2f%%, reasoning: %s",
+                            analysis.market,
+                            analysis.profit_margin,
+                            analysis.confidence,
+                            analysis.risk_score,
+                            analysis.recommendation,
+                            analysis.bet_size * 100,
+                            "; ".join(analysis.reasoning)
+                        )
                     
         except Exception as e:
             print(f"Error processing opportunities: {e}")
@@ -209,17 +482,17 @@ class AnalyzerAgent:
         if not self.pending_opportunities:
             return
         
-        updated_opportunities = []
-        for analysis in self.pending_opportunities:
+        # Rotate through the current entries once, re-queueing those still monitored
+        for _ in range(len(self.pending_opportunities)):
+            analysis = self.pending_opportunities.popleft()
+            
             # Re-evaluate based on time decay and new information
             updated_analysis = self._update_analysis(analysis)
             
             if updated_analysis.recommendation == "EXECUTE":
                 await self.send_trade_recommendation(updated_analysis)
             elif updated_analysis.recommendation == "MONITOR":
-                updated_opportunities.append(updated_analysis)
-        
-        self.pending_opportunities = updated_opportunities
+                self.pending_opportunities.append(updated_analysis)
     
     def _update_analysis(self, analysis: OpportunityAnalysis) -> OpportunityAnalysis:
         """Update analysis based on time decay and new factors"""
@@ -228,39 +501,37 @@ class AnalyzerAgent:
         updated_confidence = analysis.confidence * time_factor
         
         # Re-run MeTTa reasoning with updated confidence
-        mock_opportunity = {
-            "market": analysis.market,
-            "profit_margin": analysis.profit_margin,
-            "confidence": updated_confidence
-        }
-        
-        return self.metta_engine.analyze_opportunity(mock_opportunity)
+        return self.metta_engine.update_in_place(analysis, updated_confidence)
     
     async def send_trade_recommendation(self, analysis: OpportunityAnalysis):
         """Send trade recommendation to Executor Agent"""
         try:
-            message = {
-                "type": "trade_recommendation",
-                "from": self.agent_address,
-                "timestamp": time.time(),
-                "recommendation": {
-                    "market": analysis.market,
-                    "action": "EXECUTE",
-                    "bet_size": analysis.bet_size,
-                    "profit_margin": analysis.profit_margin,
-                    "confidence": analysis.confidence,
-                    "risk_score": analysis.risk_score,
-                    "reasoning": analysis.reasoning
-                }
-            }
+            message = self._encode_trade_recommendation(analysis)
             
             # In production, send via Fetch.ai messaging
             # For demo, log the recommendation
-            print(f"\n🚀 SENDING TRADE RECOMMENDATION TO EXECUTOR:")
-            print(json.dumps(message, indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Sending trade recommendation to executor: %s", message.decode())
             
         except Exception as e:
             print(f"Error sending trade recommendation: {e}")
+    
+    def _encode_trade_recommendation(self, analysis: OpportunityAnalysis) -> bytes:
+        """Serialize a trade recommendation message onto the prebuilt header"""
+        payload = json_codec.dumps({
+            "timestamp": time.time(),
+            "recommendation": {
+                "market": analysis.market,
+                "action": "EXECUTE",
+                "bet_size": analysis.bet_size,
+                "profit_margin": analysis.profit_margin,
+                "confidence": analysis.confidence,
+                "risk_score": analysis.risk_score,
+                "reasoning": analysis.reasoning
+            }
+        })
+        # Splice the payload's fields in after the header's: drop its opening brace
+        return self._rec_header + b"," + payload[1:]
 
 
 # MeTTa Knowledge Graph Demo
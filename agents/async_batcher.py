@@ -0,0 +1,118 @@
+"""
+Async micro-batching for ArbitrageAI agents
+
+Coroutines submit single items with `process()` and await their own result,
+while a background worker groups whatever arrives within a short window into
+one `process_batch()` call.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Set, Tuple
+
+
+class AsyncBatcher(ABC):
+    """Collects concurrently submitted items and processes them in batches
+
+    A batch is flushed as soon as it holds max_batch_size items, or once its
+    first item has waited max_queue_time seconds. Up to max_in_flight batches
+    are processed at once; the default of 1 suits CPU-bound batches, while
+    I/O-bound batches should allow more so new items need not wait out a
+    round trip already in progress. Subclasses implement process_batch and
+    return one result per item, in order.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_queue_time: float = 0.05, max_in_flight: int = 1):
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self.max_in_flight = max_in_flight
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    async def process(self, item: Any) -> Any:
+        """Submit an item and wait for its result"""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    @abstractmethod
+    async def process_batch(self, items: List[Any]) -> List[Any]:
+        """Process a batch of items, returning one result per item"""
+
+    async def stop(self):
+        """Stop the background worker and cancel every item not yet resolved"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+        self._in_flight.clear()
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def _run(self):
+        """Worker loop: gather batches and dispatch them, max_in_flight at a time"""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_in_flight)
+
+        while True:
+            await slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_queue_time
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Hand collected items back so stop() cancels them with the rest
+                for entry in batch:
+                    self._queue.put_nowait(entry)
+                raise
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run process_batch and hand each result back to its caller"""
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except asyncio.CancelledError:
+            # Stopped mid-batch: release the callers instead of leaving them waiting
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -6,20 +6,86 @@ This script demonstrates the multi-agent collaboration for the hackathon demo.
 In production, agents would run independently on Agentverse.
 """
 
+import argparse
 import asyncio
 import json
 import time
+from dataclasses import dataclass
 from typing import Dict, List
 import logging
+import numpy as np
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional; fall back to the stock asyncio loop
+    uvloop = None
 
 # Import agent classes
+from async_batcher import AsyncBatcher
 from scanner_agent import ScannerAgent
-from analyzer_agent import AnalyzerAgent, demonstrate_metta_reasoning
+from analyzer_agent import AnalyzerAgent, MeTTaReasoning, OpportunityAnalysis, demonstrate_metta_reasoning
 from executor_agent import ExecutorAgent, demonstrate_vincent_execution
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Simulated scanner output: each market is found with the given probability and
+# its fields drawn uniformly from [low, high]
+_rng = np.random.default_rng()
+_SIMULATED_FIELDS = ("market_odds", "oracle_price", "implied_price", "profit_margin", "confidence")
+_SIMULATED_MARKETS = (
+    (
+        "Will Bitcoin reach $100,000 by December 31, 2024?",
+        0.5,
+        np.array([70.0, 96500.0, 90000.0, 3.0, 70.0]),
+        np.array([80.0, 100500.0, 96000.0, 8.0, 90.0]),
+    ),
+    (
+        "Will Ethereum reach $5,000 by December 31, 2024?",
+        0.4,
+        np.array([52.0, 3600.0, 3200.0, 2.0, 65.0]),
+        np.array([68.0, 4000.0, 3800.0, 6.0, 85.0]),
+    ),
+)
+
+
+@dataclass(slots=True, frozen=True)
+class OpportunityBatch:
+    """Scanner -> Analyzer message: opportunities found in one scan"""
+    opportunities: List[Dict]
+    timestamp: float
+
+
+@dataclass(slots=True, frozen=True)
+class TradeRecommendation:
+    """Analyzer -> Executor message: an analysis recommended for execution"""
+    analysis: OpportunityAnalysis
+    timestamp: float
+    
+    def to_dict(self) -> Dict:
+        """Recommendation payload in the shape VincentIntegration expects"""
+        analysis = self.analysis
+        return {
+            "market": analysis.market,
+            "action": "EXECUTE",
+            "bet_size": analysis.bet_size,
+            "profit_margin": analysis.profit_margin,
+            "confidence": analysis.confidence,
+            "risk_score": analysis.risk_score,
+            "reasoning": analysis.reasoning
+        }
+
+
+class OpportunityBatcher(AsyncBatcher):
+    """Batches opportunities across scanner messages into single MeTTa passes"""
+    
+    def __init__(self, metta_engine: MeTTaReasoning, max_batch_size: int = 32, max_queue_time: float = 0.05):
+        super().__init__(max_batch_size=max_batch_size, max_queue_time=max_queue_time)
+        self.metta_engine = metta_engine
+    
+    async def process_batch(self, items: List[Dict]) -> List[OpportunityAnalysis]:
+        return self.metta_engine.analyze_batch(items)
+
 
 class AgentCoordinator:
     """Coordinates the multi-agent arbitrage system"""
@@ -30,9 +96,19 @@ class AgentCoordinator:
         self.analyzer = AnalyzerAgent("agent1q_analyzer_demo") 
         self.executor = ExecutorAgent("agent1q_executor_demo")
         
-        # Message queues for agent communication
-        self.opportunity_queue = asyncio.Queue()
-        self.recommendation_queue = asyncio.Queue()
+        # Message queues for agent communication; the queue identifies the message type
+        self.opportunity_queue: asyncio.Queue[OpportunityBatch] = asyncio.Queue()
+        self.recommendation_queue: asyncio.Queue[TradeRecommendation] = asyncio.Queue()
+        
+        # Set while component demonstrations are running (--demo)
+        self.demo_task = None
+        
+        # Groups opportunities into batched MeTTa analysis calls
+        self.analysis_batcher = OpportunityBatcher(self.analyzer.metta_engine)
+        
+        # Analyzer workers sharing the opportunity queue; the MeTTa engine is
+        # read-only after init so they need no locking
+        self.analyzer_workers = 4
         
         # System metrics
         self.metrics = {
@@ -40,15 +116,17 @@ class AgentCoordinator:
             "opportunities_analyzed": 0,
             "trades_executed": 0,
             "total_profit": 0.0,
-            "system_uptime": time.time()
+            "system_uptime": time.monotonic()
         }
     
-    async def start_system(self):
+    async def start_system(self, demo: bool = False):
         """Start the complete multi-agent system"""
         logger.info("🚀 Starting ArbitrageAI Multi-Agent System")
         
-        # Demonstrate individual components first
-        await self.run_demonstrations()
+        # Component demonstrations run alongside the agents instead of delaying them
+        if demo:
+            self.demo_task = asyncio.create_task(self.run_demonstrations())
+            self.demo_task.add_done_callback(self._log_demo_result)
         
         # Start coordinated agent loop
         await self.run_coordinated_loop()
@@ -59,13 +137,16 @@ class AgentCoordinator:
         
         # Demo MeTTa reasoning
         demonstrate_metta_reasoning()
-        await asyncio.sleep(2)
         
         # Demo Vincent integration
         await demonstrate_vincent_execution()
-        await asyncio.sleep(2)
         
-        logger.info("\n=== STARTING COORDINATED AGENT SYSTEM ===")
+        logger.info("\n=== COMPONENT DEMONSTRATIONS COMPLETE ===")
+    
+    def _log_demo_result(self, task: asyncio.Task):
+        """Report a failed demonstration instead of leaving its exception unretrieved"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Component demonstrations failed", exc_info=task.exception())
     
     async def run_coordinated_loop(self):
         """Run the coordinated multi-agent loop"""
@@ -73,7 +154,7 @@ class AgentCoordinator:
         # Start all agent tasks concurrently
         tasks = [
             asyncio.create_task(self.scanner_task()),
-            asyncio.create_task(self.analyzer_task()),
+            *[asyncio.create_task(self.analyzer_worker(i)) for i in range(self.analyzer_workers)],
             asyncio.create_task(self.executor_task()),
             asyncio.create_task(self.metrics_task())
         ]
@@ -84,6 +165,14 @@ class AgentCoordinator:
             logger.info("System shutdown requested")
             for task in tasks:
                 task.cancel()
+        finally:
+            if self.demo_task is not None:
+                self.demo_task.cancel()
+                await asyncio.gather(self.demo_task, return_exceptions=True)
+            await self.analysis_batcher.stop()
+            await self.analyzer.aclose()
+            await self.executor.vincent.aclose()
+            await self.scanner.aclose()
     
     async def scanner_task(self):
         """Scanner agent task - detect opportunities"""
@@ -101,64 +190,46 @@ class AgentCoordinator:
                     self.metrics["opportunities_detected"] += len(opportunities)
                     
                     # Send to analyzer via message queue
-                    message = {
-                        "type": "opportunities_detected",
-                        "from": "scanner",
-                        "timestamp": time.time(),
-                        "opportunities": opportunities
-                    }
-                    
-                    await self.opportunity_queue.put(message)
+                    await self.opportunity_queue.put(OpportunityBatch(opportunities, time.time()))
                     logger.info(f"🔍 Scanner: Found {len(opportunities)} opportunities")
                 
             except Exception as e:
                 logger.error(f"Scanner task error: {e}")
                 await asyncio.sleep(5)
     
-    async def analyzer_task(self):
-        """Analyzer agent task - analyze opportunities with MeTTa"""
+    async def analyzer_worker(self, worker_id: int):
+        """Analyzer agent worker - analyze opportunities with MeTTa"""
         while True:
             try:
                 # Wait for opportunities from scanner
-                message = await self.opportunity_queue.get()
+                batch = await self.opportunity_queue.get()
+                
+                opportunities = batch.opportunities
+                logger.info(f"🧠 Analyzer: Analyzing {len(opportunities)} opportunities...")
+                
+                # Analyze through the batcher so concurrent messages share a MeTTa pass
+                analyses = await asyncio.gather(
+                    *[self.analysis_batcher.process(opp) for opp in opportunities]
+                )
+                self.metrics["opportunities_analyzed"] += len(analyses)
                 
-                if message["type"] == "opportunities_detected":
-                    opportunities = message["opportunities"]
-                    logger.info(f"🧠 Analyzer: Analyzing {len(opportunities)} opportunities...")
+                # One clock read stamps every recommendation from this batch
+                now = time.time()
+                
+                for analysis in analyses:
+                    logger.info(f"🧠 Analyzer: {analysis.market}")
+                    logger.info(f"   Profit: {analysis.profit_margin:.1f}%")
+                    logger.info(f"   Confidence: {analysis.confidence:.1f}%")
+                    logger.info(f"   Risk: {analysis.risk_score:.1f}")
+                    logger.info(f"   Recommendation: {analysis.recommendation}")
                     
-                    # Process each opportunity
-                    for opp in opportunities:
-                        analysis = self.analyzer.metta_engine.analyze_opportunity(opp)
-                        self.metrics["opportunities_analyzed"] += 1
-                        
-                        logger.info(f"🧠 Analyzer: {opp['market']}")
-                        logger.info(f"   Profit: {analysis.profit_margin:.1f}%")
-                        logger.info(f"   Confidence: {analysis.confidence:.1f}%")
-                        logger.info(f"   Risk: {analysis.risk_score:.1f}")
-                        logger.info(f"   Recommendation: {analysis.recommendation}")
-                        
-                        # Send executable recommendations to executor
-                        if analysis.recommendation == "EXECUTE":
-                            recommendation = {
-                                "type": "trade_recommendation",
-                                "from": "analyzer",
-                                "timestamp": time.time(),
-                                "recommendation": {
-                                    "market": analysis.market,
-                                    "action": "EXECUTE",
-                                    "bet_size": analysis.bet_size,
-                                    "profit_margin": analysis.profit_margin,
-                                    "confidence": analysis.confidence,
-                                    "risk_score": analysis.risk_score,
-                                    "reasoning": analysis.reasoning
-                                }
-                            }
-                            
-                            await self.recommendation_queue.put(recommendation)
-                            logger.info(f"🧠 Analyzer: Recommending execution for {analysis.market}")
+                    # Send executable recommendations to executor
+                    if analysis.recommendation == "EXECUTE":
+                        await self.recommendation_queue.put(TradeRecommendation(analysis, now))
+                        logger.info(f"🧠 Analyzer: Recommending execution for {analysis.market}")
                 
             except Exception as e:
-                logger.error(f"Analyzer task error: {e}")
+                logger.error(f"Analyzer worker {worker_id} error: {e}")
                 await asyncio.sleep(1)
     
     async def executor_task(self):
@@ -166,27 +237,26 @@ class AgentCoordinator:
         while True:
             try:
                 # Wait for trade recommendations
-                message = await self.recommendation_queue.get()
+                trade = await self.recommendation_queue.get()
+                
+                recommendation = trade.to_dict()
+                logger.info(f"⚡ Executor: Executing trade for {recommendation['market']}")
+                
+                # Execute via Vincent
+                user_policy = self.executor.user_policies["0x_demo_user_address"]
+                execution = await self.executor.vincent.execute_trade(recommendation, user_policy)
                 
-                if message["type"] == "trade_recommendation":
-                    recommendation = message["recommendation"]
-                    logger.info(f"⚡ Executor: Executing trade for {recommendation['market']}")
+                if execution.status == "executed":
+                    self.metrics["trades_executed"] += 1
+                    self.metrics["total_profit"] += execution.expected_profit
                     
-                    # Execute via Vincent
-                    user_policy = self.executor.user_policies["0x_demo_user_address"]
-                    execution = await self.executor.vincent.execute_trade(recommendation, user_policy)
+                    logger.info(f"⚡ Executor: Trade executed successfully!")
+                    logger.info(f"   Bet Size: ${execution.bet_size:.2f}")
+                    logger.info(f"   Expected Profit: ${execution.expected_profit:.2f}")
+                    logger.info(f"   TX Hash: {execution.tx_hash}")
                     
-                    if execution.status == "executed":
-                        self.metrics["trades_executed"] += 1
-                        self.metrics["total_profit"] += execution.expected_profit
-                        
-                        logger.info(f"⚡ Executor: Trade executed successfully!")
-                        logger.info(f"   Bet Size: ${execution.bet_size:.2f}")
-                        logger.info(f"   Expected Profit: ${execution.expected_profit:.2f}")
-                        logger.info(f"   TX Hash: {execution.tx_hash}")
-                        
-                    else:
-                        logger.error(f"⚡ Executor: Trade failed - {execution.error_message}")
+                else:
+                    logger.error(f"⚡ Executor: Trade failed - {execution.error_message}")
                 
             except Exception as e:
                 logger.error(f"Executor task error: {e}")
@@ -198,7 +268,7 @@ class AgentCoordinator:
             try:
                 await asyncio.sleep(60)  # Print metrics every minute
                 
-                uptime = time.time() - self.metrics["system_uptime"]
+                uptime = time.monotonic() - self.metrics["system_uptime"]
                 
                 logger.info("\n📊 SYSTEM METRICS:")
                 logger.info(f"   Uptime: {uptime:.0f} seconds")
@@ -214,33 +284,16 @@ class AgentCoordinator:
         """Simulate scanner finding opportunities"""
         # In production, this would use real Pyth + Polymarket data
         
-        import random
-        
         # Sometimes find opportunities, sometimes don't
-        if random.random() < 0.7:  # 70% chance of finding opportunities
+        gates = _rng.random(len(_SIMULATED_MARKETS) + 1)
+        if gates[0] < 0.7:  # 70% chance of finding opportunities
             opportunities = []
+            jitter = _rng.random((len(_SIMULATED_MARKETS), len(_SIMULATED_FIELDS)))
             
-            # BTC opportunity
-            if random.random() < 0.5:
-                opportunities.append({
-                    "market": "Will Bitcoin reach $100,000 by December 31, 2024?",
-                    "market_odds": 75 + random.uniform(-5, 5),
-                    "oracle_price": 98500 + random.uniform(-2000, 2000),
-                    "implied_price": 93000 + random.uniform(-3000, 3000),
-                    "profit_margin": random.uniform(3, 8),
-                    "confidence": random.uniform(70, 90)
-                })
-            
-            # ETH opportunity  
-            if random.random() < 0.4:
-                opportunities.append({
-                    "market": "Will Ethereum reach $5,000 by December 31, 2024?",
-                    "market_odds": 60 + random.uniform(-8, 8),
-                    "oracle_price": 3800 + random.uniform(-200, 200),
-                    "implied_price": 3500 + random.uniform(-300, 300),
-                    "profit_margin": random.uniform(2, 6),
-                    "confidence": random.uniform(65, 85)
-                })
+            for (market, probability, low, high), gate, draw in zip(_SIMULATED_MARKETS, gates[1:], jitter):
+                if gate < probability:
+                    values = (low + (high - low) * draw).tolist()
+                    opportunities.append({"market": market, **dict(zip(_SIMULATED_FIELDS, values))})
             
             return opportunities
         
@@ -250,10 +303,14 @@ class AgentCoordinator:
 # Main demo function
 async def main():
     """Main entry point for agent coordination demo"""
+    parser = argparse.ArgumentParser(description="Run the ArbitrageAI multi-agent system")
+    parser.add_argument("--demo", action="store_true", help="also run the component demonstrations")
+    args = parser.parse_args()
+    
     coordinator = AgentCoordinator()
     
     try:
-        await coordinator.start_system()
+        await coordinator.start_system(demo=args.demo)
     except KeyboardInterrupt:
         logger.info("👋 System shutting down gracefully...")
 
@@ -263,4 +320,7 @@ if __name__ == "__main__":
     print("🏆 Targeting ASI Alliance, Pyth Network, and Lit Protocol prizes")
     print("🚀 Press Ctrl+C to stop\n")
     
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -7,14 +7,72 @@ them using Lit Protocol Vincent for non-custodial automated trading.
 """
 
 import asyncio
+import heapq
 import json
+import logging
+import re
+import secrets
 import time
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
 import aiohttp
 
+import json_codec
+from async_batcher import AsyncBatcher
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Seconds a delegation check is trusted before re-verifying on-chain
+DELEGATION_CACHE_TTL = 60.0
+
+# Most transactions sent in one JSON-RPC batch
+MAX_RPC_BATCH_SIZE = 32
+# Most JSON-RPC batches awaiting a reply at once, sized for the Base RPC endpoint
+MAX_RPC_BATCHES_IN_FLIGHT = 4
+# Most trades executing at once; enough to fill every in-flight batch so bursts share round trips
+MAX_CONCURRENT_EXECUTIONS = MAX_RPC_BATCH_SIZE * MAX_RPC_BATCHES_IN_FLIGHT
+
+# Most recent trades kept in active_trades; older entries are evicted first
+MAX_ACTIVE_TRADES = 10_000
+# Most recent trades kept in each user's history; older entries are dropped first
+MAX_TRADE_HISTORY = 1_000
+
+# Seconds after execution before a trade is due for settlement monitoring
+SETTLEMENT_DELAY = 300.0
+# Seconds between checks on a trade that is due but still unsettled
+MONITOR_INTERVAL = 15.0
+
+
+@lru_cache(maxsize=256)
+def _compile_approved_markets(approved_markets: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """Compile approved market names into one alternation, None if the list is empty"""
+    if not approved_markets:
+        return None
+    return re.compile("|".join(map(re.escape, approved_markets)))
+
+
+def compile_policy(policy: Dict) -> Dict:
+    """Precompile a user policy's approved_markets into policy["_approved_re"]"""
+    policy["_approved_re"] = _compile_approved_markets(tuple(policy.get("approved_markets", ())))
+    return policy
+
+
+def _new_trade_id() -> str:
+    """Trade ID that stays unique when several trades finish in the same second"""
+    return f"trade_{int(time.time())}_{secrets.token_hex(4)}"
+
+
+def _encode_sync(recommendation: Dict, bet_size: float) -> str:
+    """Encode Polymarket bet transaction data"""
+    # In production, properly encode CLOB contract call
+    # For demo, return mock data
+    return "0x1234567890abcdef"
+
+
+@dataclass(slots=True)
 class TradeExecution:
     trade_id: str
     market: str
@@ -24,20 +82,62 @@ class TradeExecution:
     status: str  # "pending", "executed", "failed"
     timestamp: float
     error_message: Optional[str] = None
+    # Clock for elapsed-time checks; unaffected by wall-clock adjustments
+    monotonic_ts: float = field(default_factory=time.monotonic)
+
+
+class TransactionBatcher(AsyncBatcher):
+    """Groups Vincent transactions into JSON-RPC batch submissions"""
+    
+    def __init__(self, vincent: "VincentIntegration", max_batch_size: int = MAX_RPC_BATCH_SIZE,
+                 max_queue_time: float = 0.05, max_in_flight: int = MAX_RPC_BATCHES_IN_FLIGHT):
+        # Up to max_in_flight round trips overlap, so new trades need not wait for a batch already sent
+        super().__init__(max_batch_size=max_batch_size, max_queue_time=max_queue_time, max_in_flight=max_in_flight)
+        self.vincent = vincent
+    
+    async def process_batch(self, items: List[Dict]) -> List[Optional[str]]:
+        return await self.vincent._submit_transaction_batch(items)
 
 
 class VincentIntegration:
     """Integration with Lit Protocol Vincent for automated execution"""
     
-    def __init__(self, vincent_app_address: str, base_rpc_url: str):
+    def __init__(self, vincent_app_address: str, base_rpc_url: str, simulate: bool = True):
         self.vincent_app_address = vincent_app_address
         self.base_rpc_url = base_rpc_url
         self.polymarket_clob_address = "0x4bFb41d5B3570DeFd03C39a9A4D8dE6Bd8B8982E"
+        # For demo, simulate RPC submission instead of sending to base_rpc_url
+        self.simulate = simulate
+        
+        # Transactions arriving within 50ms share one JSON-RPC round trip
+        self._tx_batcher = TransactionBatcher(self)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._encoder_pool = ThreadPoolExecutor(max_workers=4)
+        
+        # user_address -> (checked_at monotonic, delegation valid)
+        self._delegation_cache: Dict[str, Tuple[float, bool]] = {}
+    
+    async def aclose(self):
+        """Stop transaction batching, the encoder pool and the RPC session"""
+        await self._tx_batcher.stop()
+        self._encoder_pool.shutdown(wait=False)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared RPC session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=10),
+                json_serialize=json_codec.dumps_text
+            )
+        return self._session
         
     async def execute_trade(self, recommendation: Dict, user_policy: Dict) -> TradeExecution:
         """Execute trade through Vincent App"""
         try:
-            trade_id = f"trade_{int(time.time())}"
+            trade_id = _new_trade_id()
             
             # Check policy compliance
             if not self._check_policy_compliance(recommendation, user_policy):
@@ -87,7 +187,7 @@ class VincentIntegration:
             
         except Exception as e:
             return TradeExecution(
-                trade_id=f"trade_{int(time.time())}",
+                trade_id=_new_trade_id(),
                 market=recommendation.get("market", "unknown"),
                 bet_size=0,
                 expected_profit=0,
@@ -113,8 +213,11 @@ class VincentIntegration:
             return False
         
         # Check if market is approved
-        approved_markets = user_policy.get("approved_markets", [])
-        if approved_markets and not any(market in recommendation["market"] for market in approved_markets):
+        if "_approved_re" in user_policy:
+            approved_re = user_policy["_approved_re"]
+        else:
+            approved_re = _compile_approved_markets(tuple(user_policy.get("approved_markets", ())))
+        if approved_re is not None and approved_re.search(recommendation["market"]) is None:
             return False
         
         return True
@@ -125,10 +228,12 @@ class VincentIntegration:
             # For demo purposes, simulate Vincent execution
             # In production, this would interact with actual Vincent SDK
             
-            print(f"\n💰 EXECUTING TRADE VIA VINCENT:")
-            print(f"Market: {recommendation['market']}")
-            print(f"Bet Size: ${bet_size:.2f}")
-            print(f"Expected Profit: ${bet_size * recommendation['profit_margin'] / 100:.2f}")
+            logger.debug(
+                "💰 Executing trade via Vincent: %s, bet size $%.2f, expected profit $%.2f",
+                recommendation["market"],
+                bet_size,
+                bet_size * recommendation["profit_margin"] / 100
+            )
             
             # Simulate Vincent App execution steps:
             
@@ -140,37 +245,66 @@ class VincentIntegration:
             # 2. Prepare transaction data
             tx_data = {
                 "to": self.polymarket_clob_address,
-                "data": self._encode_polymarket_bet(recommendation, bet_size),
+                "data": await self._encode_polymarket_bet(recommendation, bet_size),
                 "value": 0,
                 "gasLimit": 200000
             }
             
-            # 3. Execute through Vincent (simulated)
-            await asyncio.sleep(2)  # Simulate transaction time
-            
-            # Generate mock transaction hash
-            mock_tx_hash = f"0x{''.join([hex(int(time.time()) + i)[2:] for i in range(8)])}"
+            # 3. Execute through Vincent, batched with concurrent trades
+            tx_hash = await self._tx_batcher.process(tx_data)
             
-            print(f"✅ Trade executed successfully!")
-            print(f"Transaction Hash: {mock_tx_hash}")
+            logger.debug("✅ Trade executed successfully, transaction hash %s", tx_hash)
             
-            return mock_tx_hash
+            return tx_hash
             
         except Exception as e:
-            print(f"❌ Vincent execution failed: {e}")
+            logger.error("❌ Vincent execution failed: %s", e)
             raise e
     
+    async def _submit_transaction_batch(self, transactions: List[Dict]) -> List[Optional[str]]:
+        """Submit transactions as one JSON-RPC batch, returning a hash or None per transaction"""
+        # In production, params carry the transaction as signed by the Vincent SDK
+        batch = [
+            {"jsonrpc": "2.0", "id": i, "method": "eth_sendRawTransaction", "params": [tx]}
+            for i, tx in enumerate(transactions)
+        ]
+        
+        if self.simulate:
+            await asyncio.sleep(2)  # Simulate one transaction round trip for the batch
+            
+            # Generate mock transaction hashes
+            return ["0x" + secrets.token_hex(32) for _ in batch]
+        
+        session = await self._get_session()
+        async with session.post(self.base_rpc_url, json=batch) as response:
+            response.raise_for_status()
+            replies = {reply["id"]: reply for reply in await response.json(loads=json_codec.loads)}
+        
+        return [replies.get(request["id"], {}).get("result") for request in batch]
+    
     async def _check_user_delegation(self, user_address: str) -> bool:
-        """Check if user delegation is valid"""
+        """Check if user delegation is valid, reusing results for DELEGATION_CACHE_TTL seconds"""
+        checked_at, valid = self._delegation_cache.get(user_address, (0.0, False))
+        if checked_at and time.monotonic() - checked_at < DELEGATION_CACHE_TTL:
+            return valid
+        
         # In production, verify Vincent delegation on-chain
         # For demo, always return True
-        return True
+        valid = True
+        
+        self._delegation_cache[user_address] = (time.monotonic(), valid)
+        return valid
+    
+    def invalidate_delegation(self, user_address: str):
+        """Drop the cached delegation check for a user"""
+        self._delegation_cache.pop(user_address, None)
     
-    def _encode_polymarket_bet(self, recommendation: Dict, bet_size: float) -> str:
-        """Encode Polymarket bet transaction data"""
-        # In production, properly encode CLOB contract call
-        # For demo, return mock data
-        return "0x1234567890abcdef"
+    async def _encode_polymarket_bet(self, recommendation: Dict, bet_size: float) -> str:
+        """Encode Polymarket bet transaction data off the event loop"""
+        # ABI encoding is synchronous CPU work, so keep it from stalling concurrent trades
+        return await asyncio.get_running_loop().run_in_executor(
+            self._encoder_pool, _encode_sync, recommendation, bet_size
+        )
 
 
 class ExecutorAgent:
@@ -181,11 +315,19 @@ class ExecutorAgent:
             vincent_app_address="0x_vincent_app_address_here",
             base_rpc_url="https://mainnet.base.org"
         )
-        self.active_trades = {}
+        self._exec_sem = asyncio.Semaphore(MAX_CONCURRENT_EXECUTIONS)
+        self.active_trades: "OrderedDict[str, TradeExecution]" = OrderedDict()
+        self.trades_by_user: Dict[str, Deque[TradeExecution]] = defaultdict(
+            lambda: deque(maxlen=MAX_TRADE_HISTORY)
+        )
+        
+        # Min-heap of (monotonic deadline, trade_id) for executed trades awaiting settlement
+        self._settle_heap: List[Tuple[float, str]] = []
+        self._settle_event = asyncio.Event()
         self.user_policies = {}  # In production, fetch from database
         
         # Demo user policy
-        self.user_policies["0x_demo_user_address"] = {
+        self.user_policies["0x_demo_user_address"] = compile_policy({
             "user_address": "0x_demo_user_address",
             "bankroll": 1000.0,  # $1000
             "max_bet_size": 200.0,  # $200 max per bet
@@ -195,22 +337,25 @@ class ExecutorAgent:
             "max_risk_score": 65.0,     # 65 max risk score
             "approved_markets": ["Bitcoin", "Ethereum", "BTC", "ETH"],
             "is_active": True
-        }
+        })
     
     async def start_executing(self):
         """Main execution loop"""
         print(f"Executor Agent {self.agent_address} starting...")
         
-        while True:
-            try:
-                # In production, listen for trade recommendations
-                # For demo, check for pending executions
-                await self.monitor_active_trades()
-                await asyncio.sleep(15)  # Check every 15 seconds
-                
-            except Exception as e:
-                print(f"Error in execution loop: {e}")
-                await asyncio.sleep(5)
+        try:
+            while True:
+                try:
+                    # In production, listen for trade recommendations
+                    # For demo, check for pending executions
+                    await self.monitor_active_trades()
+                    await self._wait_for_next_deadline()
+                    
+                except Exception as e:
+                    print(f"Error in execution loop: {e}")
+                    await asyncio.sleep(5)
+        finally:
+            await self.vincent.aclose()
     
     async def receive_trade_recommendation(self, message: Dict):
         """Receive trade recommendation from Analyzer Agent"""
@@ -218,61 +363,94 @@ class ExecutorAgent:
             if message.get("type") == "trade_recommendation":
                 recommendation = message.get("recommendation", {})
                 
-                print(f"\n📨 Received trade recommendation:")
-                print(f"Market: {recommendation.get('market')}")
-                print(f"Profit: {recommendation.get('profit_margin', 0):.2f}%")
-                print(f"Confidence: {recommendation.get('confidence', 0):.1f}%")
+                logger.debug(
+                    "📨 Received trade recommendation: %s, profit %.2f%%, confidence %.1f%%",
+                    recommendation.get("market"),
+                    recommendation.get("profit_margin", 0),
+                    recommendation.get("confidence", 0)
+                )
                 
                 # For demo, use default user policy
                 user_address = "0x_demo_user_address"
                 user_policy = self.user_policies.get(user_address)
                 
                 if not user_policy or not user_policy["is_active"]:
-                    print("❌ No active user policy found")
+                    logger.warning("❌ No active user policy found")
                     return
                 
-                # Execute trade
-                execution = await self.vincent.execute_trade(recommendation, user_policy)
+                # Execute trade, queueing behind bursts beyond the concurrency limit
+                async with self._exec_sem:
+                    execution = await self.vincent.execute_trade(recommendation, user_policy)
                 
                 # Store execution record
                 self.active_trades[execution.trade_id] = execution
+                while len(self.active_trades) > MAX_ACTIVE_TRADES:
+                    self.active_trades.popitem(last=False)
+                self.trades_by_user[user_address].append(execution)
+                if execution.status == "executed":
+                    self._schedule_settlement(execution.trade_id, execution.monotonic_ts + SETTLEMENT_DELAY)
                 
                 # Log result
                 if execution.status == "executed":
-                    print(f"✅ Trade executed successfully!")
-                    print(f"Trade ID: {execution.trade_id}")
-                    print(f"Bet Size: ${execution.bet_size:.2f}")
-                    print(f"Expected Profit: ${execution.expected_profit:.2f}")
-                    print(f"TX Hash: {execution.tx_hash}")
+                    logger.debug(
+                        "✅ Trade %s executed: bet size $%.2f, expected profit $%.2f, TX hash %s",
+                        execution.trade_id,
+                        execution.bet_size,
+                        execution.expected_profit,
+                        execution.tx_hash
+                    )
                 else:
-                    print(f"❌ Trade execution failed: {execution.error_message}")
+                    logger.error("❌ Trade execution failed: %s", execution.error_message)
                 
         except Exception as e:
             print(f"Error processing trade recommendation: {e}")
     
+    def _schedule_settlement(self, trade_id: str, deadline: float):
+        """Queue a trade for monitoring at a monotonic deadline"""
+        heapq.heappush(self._settle_heap, (deadline, trade_id))
+        self._settle_event.set()
+    
+    async def _wait_for_next_deadline(self):
+        """Sleep until the earliest settlement deadline, or until a trade is scheduled"""
+        if self._settle_heap:
+            await asyncio.sleep(max(0.0, self._settle_heap[0][0] - time.monotonic()))
+        else:
+            self._settle_event.clear()
+            await self._settle_event.wait()
+    
     async def monitor_active_trades(self):
-        """Monitor active trades for settlement"""
-        for trade_id, execution in list(self.active_trades.items()):
-            if execution.status == "executed":
-                # In production, monitor on-chain for settlement
-                # For demo, simulate trade monitoring
-                elapsed_time = time.time() - execution.timestamp
-                
-                if elapsed_time > 300:  # 5 minutes for demo
-                    print(f"🔄 Monitoring trade {trade_id} - {elapsed_time:.0f}s elapsed")
+        """Monitor active trades whose settlement deadline has passed"""
+        now = time.monotonic()
+        # Only due trades are visited; nothing else in active_trades is touched or copied
+        while self._settle_heap and self._settle_heap[0][0] <= now:
+            trade_id = self._settle_heap[0][1]
+            execution = self.active_trades.get(trade_id)
+            if execution is None or execution.status != "executed":
+                heapq.heappop(self._settle_heap)
+                continue
+            
+            # In production, monitor on-chain for settlement
+            # For demo, simulate trade monitoring
+            elapsed_time = now - execution.monotonic_ts
+            print(f"🔄 Monitoring trade {trade_id} - {elapsed_time:.0f}s elapsed")
+            
+            # Check again later until the trade settles, re-keying the entry in one sift
+            heapq.heapreplace(self._settle_heap, (now + MONITOR_INTERVAL, trade_id))
     
     async def update_user_policy(self, user_address: str, policy_update: Dict):
         """Update user trading policy"""
         if user_address in self.user_policies:
-            self.user_policies[user_address].update(policy_update)
+            policy = self.user_policies[user_address]
+            policy.update(policy_update)
+            compile_policy(policy)
+            self.vincent.invalidate_delegation(user_address)
             print(f"📝 Updated policy for user {user_address}")
         else:
             print(f"❌ User {user_address} not found")
     
     def get_trade_history(self, user_address: str) -> List[TradeExecution]:
-        """Get trade history for user"""
-        return [trade for trade in self.active_trades.values() 
-                if user_address in self.user_policies]
+        """Get trade history for user, oldest first"""
+        return list(self.trades_by_user.get(user_address, ()))
 
 
 # Demo function for Vincent integration
@@ -306,6 +484,7 @@ async def demonstrate_vincent_execution():
     
     vincent = VincentIntegration("0x_vincent_app", "https://mainnet.base.org")
     execution = await vincent.execute_trade(recommendation, user_policy)
+    await vincent.aclose()
     
     print(f"Execution Result:")
     print(f"  Status: {execution.status}")
@@ -0,0 +1,35 @@
+"""
+JSON encoding shared by ArbitrageAI agents
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. Output is compact UTF-8 JSON either way.
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib codec
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or text"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def dumps_text(obj: Any) -> str:
+    """Serialize obj to compact JSON text, e.g. for aiohttp's json_serialize"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
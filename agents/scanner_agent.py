@@ -7,14 +7,29 @@ and publishes findings to the Analyzer Agent.
 """
 
 import asyncio
-import json
+import logging
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import aiohttp
-from dataclasses import dataclass
+import numpy as np
+from dataclasses import dataclass, fields
 
+import json_codec
 
-@dataclass
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; frames are then JSON encoded
+    msgpack = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is optional; Pyth feeds are then parsed as dicts
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
 class OpportunityData:
     market: str
     market_odds: float
@@ -25,6 +40,37 @@ class OpportunityData:
     detected_at: float
 
 
+if msgspec is not None:
+    class PythPrice(msgspec.Struct):
+        """Price fields of a Pyth feed; Hermes sends the integers as strings"""
+        price: int
+        conf: int
+        expo: int
+        publish_time: int
+
+    class PythFeed(msgspec.Struct):
+        id: str = ""
+        price: Optional[PythPrice] = None
+
+    class PythUpdate(msgspec.Struct):
+        parsed: List[PythFeed] = []
+
+    # strict=False lets the decoder convert Hermes' string integers
+    _pyth_feeds_decoder = msgspec.json.Decoder(List[PythFeed], strict=False)
+    _pyth_update_decoder = msgspec.json.Decoder(PythUpdate, strict=False)
+
+
+# Column order of opportunity rows in messages to the Analyzer Agent
+OPPORTUNITY_FIELDS = tuple(f.name for f in fields(OpportunityData))
+
+
+def _pack_message(message: Dict) -> bytes:
+    """Encode a message as one msgpack frame, or UTF-8 JSON without msgpack"""
+    if msgpack is not None:
+        return msgpack.packb(message)
+    return json_codec.dumps(message)
+
+
 class ScannerAgent:
     def __init__(self, agent_address: str):
         self.agent_address = agent_address
@@ -36,53 +82,148 @@ class ScannerAgent:
             "BTC": "0xe62df6c8b4a85fe1a67db44dc12de5db330f7ac66b72dc658afedf0f4a415b43",
             "ETH": "0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace"
         }
+        self._id_to_symbol = {pid: sym for sym, pid in self.price_ids.items()}
         
         self.analyzer_agent_address = "agent1q_analyzer_address_here"
         self.last_scan_time = 0
-        self.scan_interval = 30  # 30 seconds
+        self.scan_interval = 30  # 30 seconds without price updates
+        self.min_scan_interval = 1.0  # At most one update-triggered scan per second
+        self.polymarket_interval = 30  # Market odds are refetched at most every 30 seconds
+        self.min_margin_change = 0.5  # Percentage points before an opportunity is re-sent
+        
+        # HTTP session shared across scans so connections are kept alive
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Latest Pyth prices by symbol, kept current by the price stream
+        self._latest_prices: Dict[str, Dict] = {}
+        # Set by the price stream whenever new prices arrive, to wake the scan loop
+        self._prices_updated = asyncio.Event()
+        
+        # Polymarket markets from the last fetch, and when it happened (monotonic)
+        self._markets: List[Dict] = []
+        self._markets_fetched_at = 0.0
+        
+        # Last profit margin sent per market, so unchanged opportunities are not re-sent
+        self._sent_margins: Dict[str, float] = {}
         
     async def start_scanning(self):
         """Main scanning loop - runs continuously"""
         print(f"Scanner Agent {self.agent_address} starting...")
         
+        try:
+            await asyncio.gather(self._stream_pyth(), self._scan_loop())
+        finally:
+            await self.aclose()
+    
+    async def _scan_loop(self):
+        """Scan on streamed price updates, min_scan_interval apart, or every scan_interval seconds"""
         while True:
             try:
+                self._prices_updated.clear()
                 await self.scan_markets()
-                await asyncio.sleep(self.scan_interval)
+                
+                # Updates arriving during the scan or the rest below trigger the next scan
+                await asyncio.sleep(self.min_scan_interval)
+                try:
+                    await asyncio.wait_for(
+                        self._prices_updated.wait(),
+                        max(0.0, self.scan_interval - self.min_scan_interval)
+                    )
+                except asyncio.TimeoutError:
+                    pass  # No stream updates; scan with REST prices
             except Exception as e:
                 print(f"Error in scanning loop: {e}")
                 await asyncio.sleep(5)  # Short retry delay
     
+    async def _stream_pyth(self):
+        """Keep _latest_prices current from the Pyth Hermes SSE price stream"""
+        url = f"{self.pyth_endpoint}/v2/updates/price/stream"
+        params = {"ids[]": list(self.price_ids.values()), "parsed": "true"}
+        
+        while True:
+            try:
+                session = await self._get_session()
+                # The stream stays open indefinitely; only bound the wait between updates
+                timeout = aiohttp.ClientTimeout(total=None, sock_read=30)
+                async with session.get(url, params=params, timeout=timeout) as response:
+                    if response.status != 200:
+                        print(f"Pyth stream error: {response.status}")
+                    else:
+                        async for line in response.content:
+                            if not line.startswith(b"data:"):
+                                continue
+                            
+                            try:
+                                prices = self._decode_prices(line[5:], stream=True)
+                            except (ValueError, TypeError, AttributeError) as e:
+                                # One bad frame should not cost the connection and price cache
+                                logger.warning("Skipping malformed Pyth stream frame: %s", e)
+                                continue
+                            if prices:
+                                self._latest_prices.update(prices)
+                                self._prices_updated.set()
+                        
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Pyth stream error: {e}")
+            
+            # Scans fall back to REST polling until the stream reconnects
+            self._latest_prices.clear()
+            await asyncio.sleep(5)
+    
+    async def aclose(self):
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=5),
+                json_serialize=json_codec.dumps_text
+            )
+        return self._session
+    
     async def scan_markets(self):
         """Scan for arbitrage opportunities"""
         try:
-            # Fetch latest prices from Pyth
-            prices = await self.fetch_pyth_prices()
-            if not prices:
+            # Get latest prices from Pyth and Polymarket data concurrently
+            prices, markets = await asyncio.gather(
+                self._current_prices(),
+                self._current_markets(),
+                return_exceptions=True
+            )
+            
+            if isinstance(prices, Exception) or not prices:
                 print("Failed to fetch Pyth prices")
                 return
             
-            # Fetch Polymarket data
-            markets = await self.fetch_polymarket_data()
-            if not markets:
+            if isinstance(markets, Exception) or not markets:
                 print("Failed to fetch Polymarket data")
                 return
             
-            # Analyze each market for opportunities
-            opportunities = []
-            for market in markets:
-                opportunity = self.analyze_market(market, prices)
-                if opportunity and opportunity.profit_margin > 3.0:  # 3% minimum
-                    opportunities.append(opportunity)
+            # One clock read stamps everything found in this scan
+            now = time.time()
+            
+            # Analyze all markets at once for opportunities
+            opportunities = self._changed_opportunities(
+                self._analyze_batch(markets, prices, detected_at=now)
+            )
             
             # Send opportunities to Analyzer Agent
             if opportunities:
-                await self.send_opportunities_to_analyzer(opportunities)
+                await self.send_opportunities_to_analyzer(opportunities, now=now)
                 print(f"Found {len(opportunities)} arbitrage opportunities")
             else:
-                print("No profitable opportunities found")
+                # Scans follow the price stream, so this is routine
+                logger.debug("No new or changed opportunities found")
                 
-            self.last_scan_time = time.time()
+            self.last_scan_time = now
             
         except Exception as e:
             print(f"Error in scan_markets: {e}")
@@ -93,44 +234,104 @@ class ScannerAgent:
             price_ids = list(self.price_ids.values())
             url = f"{self.pyth_endpoint}/api/latest_price_feeds"
             
-            async with aiohttp.ClientSession() as session:
-                params = {"ids[]": price_ids}
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        prices = {}
-                        for feed in data:
-                            price_id = feed.get("id")
-                            price_data = feed.get("price", {})
-                            
-                            # Map price ID back to symbol
-                            symbol = None
-                            for sym, pid in self.price_ids.items():
-                                if pid == price_id:
-                                    symbol = sym
-                                    break
-                            
-                            if symbol and price_data:
-                                price = int(price_data.get("price", 0))
-                                expo = int(price_data.get("expo", 0))
-                                actual_price = price * (10 ** expo)
-                                
-                                prices[symbol] = {
-                                    "price": actual_price,
-                                    "confidence": int(price_data.get("conf", 0)) * (10 ** expo),
-                                    "publish_time": int(price_data.get("publish_time", 0))
-                                }
-                        
-                        return prices
-                    else:
-                        print(f"Pyth API error: {response.status}")
-                        return None
-                        
+            session = await self._get_session()
+            params = {"ids[]": price_ids}
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    return self._decode_prices(await response.read())
+                else:
+                    print(f"Pyth API error: {response.status}")
+                    return None
+                    
         except Exception as e:
             print(f"Error fetching Pyth prices: {e}")
             return None
     
+    def _decode_prices(self, body: bytes, stream: bool = False) -> Dict[str, Dict]:
+        """Decode a Pyth feed list, or a stream update wrapping one, into {symbol: price data}"""
+        if msgspec is not None:
+            try:
+                if stream:
+                    feeds = _pyth_update_decoder.decode(body).parsed
+                else:
+                    feeds = _pyth_feeds_decoder.decode(body)
+            except msgspec.DecodeError:
+                pass  # Malformed or unexpected shape; the dict path below tolerates or reports it
+            else:
+                prices = {}
+                for feed in feeds:
+                    if feed.price is None:
+                        continue
+                    symbol = self._id_to_symbol.get(feed.id if feed.id.startswith("0x") else f"0x{feed.id}")
+                    if symbol:
+                        scale = 10 ** feed.price.expo
+                        prices[symbol] = {
+                            "price": feed.price.price * scale,
+                            "confidence": feed.price.conf * scale,
+                            "publish_time": feed.price.publish_time
+                        }
+                return prices
+        
+        data = json_codec.loads(body)
+        prices = {}
+        for feed in (data.get("parsed", []) if stream else data):
+            parsed = self._parse_price_feed(feed)
+            if parsed:
+                symbol, price = parsed
+                prices[symbol] = price
+        return prices
+    
+    def _parse_price_feed(self, feed: Dict) -> Optional[Tuple[str, Dict]]:
+        """Convert a Pyth price feed into (symbol, price data)"""
+        # Hermes reports feed IDs without the 0x prefix used in price_ids
+        price_id = feed.get("id", "")
+        if not price_id.startswith("0x"):
+            price_id = f"0x{price_id}"
+        price_data = feed.get("price", {})
+        
+        # Map price ID back to symbol
+        symbol = self._id_to_symbol.get(price_id)
+        
+        if not symbol or not price_data:
+            return None
+        
+        scale = 10 ** int(price_data.get("expo", 0))
+        
+        return symbol, {
+            "price": int(price_data.get("price", 0)) * scale,
+            "confidence": int(price_data.get("conf", 0)) * scale,
+            "publish_time": int(price_data.get("publish_time", 0))
+        }
+    
+    async def _current_prices(self) -> Optional[Dict]:
+        """Latest streamed prices, or a REST fetch while the stream has none"""
+        if self._latest_prices:
+            return dict(self._latest_prices)
+        return await self.fetch_pyth_prices()
+    
+    async def _current_markets(self) -> List[Dict]:
+        """Cached Polymarket data, refetched once it is polymarket_interval seconds old"""
+        if not self._markets or time.monotonic() - self._markets_fetched_at >= self.polymarket_interval:
+            self._markets = await self.fetch_polymarket_data()
+            self._markets_fetched_at = time.monotonic()
+        return self._markets
+    
+    def _changed_opportunities(self, opportunities: List[OpportunityData]) -> List[OpportunityData]:
+        """Keep opportunities that are new or whose margin moved by min_margin_change"""
+        changed = []
+        for opp in opportunities:
+            last_margin = self._sent_margins.get(opp.market)
+            if last_margin is None or abs(opp.profit_margin - last_margin) >= self.min_margin_change:
+                changed.append(opp)
+                self._sent_margins[opp.market] = opp.profit_margin
+        
+        # Markets that stopped being opportunities are sent again if they return
+        current = {opp.market for opp in opportunities}
+        for market in self._sent_margins.keys() - current:
+            del self._sent_margins[market]
+        
+        return changed
+    
     async def fetch_polymarket_data(self) -> List[Dict]:
         """Fetch market data from Polymarket"""
         # For hackathon demo, return mock data
@@ -158,102 +359,121 @@ class ScannerAgent:
         
         return mock_markets
     
-    def analyze_market(self, market: Dict, prices: Dict) -> Optional[OpportunityData]:
+    def analyze_market(self, market: Dict, prices: Dict, detected_at: Optional[float] = None) -> Optional[OpportunityData]:
         """Analyze a single market for arbitrage opportunity"""
-        try:
-            asset = market.get("asset")
-            if asset not in prices:
-                return None
-            
-            oracle_price = prices[asset]["price"]
-            market_odds = market["odds"]
-            target_price = market["target_price"]
-            
-            # Calculate implied price based on market odds
-            # If market says 75% chance BTC hits $100k, what should current price be?
-            implied_probability = market_odds / 100
-            time_factor = 0.9  # Assume 90% of time period remaining
-            
-            # Simplified implied current price calculation
-            implied_price = target_price * (1 - implied_probability * time_factor)
-            
-            # Calculate profit margin
-            profit_margin = ((oracle_price - implied_price) / implied_price) * 100
-            
-            # Calculate confidence score
-            confidence = self.calculate_confidence(market, prices[asset], profit_margin)
-            
-            return OpportunityData(
-                market=market["question"],
-                market_odds=market_odds,
-                oracle_price=oracle_price,
-                implied_price=implied_price,
-                profit_margin=profit_margin,
-                confidence=confidence,
-                detected_at=time.time()
-            )
-            
-        except Exception as e:
-            print(f"Error analyzing market {market.get('id', 'unknown')}: {e}")
-            return None
+        opportunities = self._analyze_batch(
+            [market], prices,
+            detected_at=detected_at if detected_at is not None else time.time(),
+            min_profit_margin=float("-inf")
+        )
+        return opportunities[0] if opportunities else None
     
-    def calculate_confidence(self, market: Dict, price_data: Dict, profit_margin: float) -> float:
-        """Calculate confidence score for opportunity"""
-        confidence = 50.0  # Base confidence
+    def _analyze_batch(self, markets: List[Dict], prices: Dict, detected_at: float,
+                       min_profit_margin: float = 3.0) -> List[OpportunityData]:
+        """Analyze markets for arbitrage opportunities in one vectorized pass
         
-        # Volume factor
-        volume = market.get("volume", 0)
-        if volume > 1000000:
-            confidence += 20
-        elif volume > 100000:
-            confidence += 10
+        Returns opportunities with a profit margin above min_profit_margin, in
+        market order. Markets without a price for their asset are skipped.
+        """
+        questions, rows = [], []
+        for market in markets:
+            try:
+                asset = market.get("asset")
+                if asset not in prices:
+                    continue
+                price_data = prices[asset]
+                row = (
+                    market["odds"], market["target_price"], market.get("volume", 0),
+                    price_data["price"], price_data["confidence"]
+                )
+                question = market["question"]
+            except Exception as e:
+                print(f"Error analyzing market {market.get('id', 'unknown')}: {e}")
+                continue
+            rows.append(row)
+            questions.append(question)
         
-        # Profit margin factor
-        if profit_margin > 10:
-            confidence += 30
-        elif profit_margin > 5:
-            confidence += 20
-        elif profit_margin > 3:
-            confidence += 10
+        if not rows:
+            return []
         
-        # Price confidence factor
-        price_conf_ratio = price_data["confidence"] / price_data["price"]
-        if price_conf_ratio < 0.001:
-            confidence += 15
-        elif price_conf_ratio < 0.01:
-            confidence += 10
-        elif price_conf_ratio > 0.05:
-            confidence -= 10
+        odds, target_price, volume, oracle_price, price_conf = (
+            np.asarray(column, dtype=np.float64) for column in zip(*rows)
+        )
+        
+        # Calculate implied price based on market odds
+        # If market says 75% chance BTC hits $100k, what should current price be?
+        # Assume 90% of time period remaining
+        implied_price = target_price * (1 - odds / 100 * 0.9)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profit_margin = ((oracle_price - implied_price) / implied_price) * 100
+            price_conf_ratio = price_conf / oracle_price
         
-        return min(max(confidence, 0), 100)
+        # Markets with a zero implied or oracle price have no meaningful margin
+        keep = (profit_margin > min_profit_margin) & (implied_price != 0) & (oracle_price != 0)
+        if not keep.any():
+            return []
+        
+        # Confidence: base 50, adjusted for volume, profit margin and Pyth price confidence
+        confidence = (
+            50.0
+            + np.select([volume > 1000000, volume > 100000], [20, 10], 0)
+            + np.select([profit_margin > 10, profit_margin > 5, profit_margin > 3], [30, 20, 10], 0)
+            + np.select(
+                [price_conf_ratio < 0.001, price_conf_ratio < 0.01, price_conf_ratio > 0.05],
+                [15, 10, -10], 0
+            )
+        )
+        np.clip(confidence, 0, 100, out=confidence)
+        
+        indices = np.flatnonzero(keep)
+        return [
+            OpportunityData(
+                market=questions[i],
+                market_odds=rows[i][0],
+                oracle_price=rows[i][3],
+                implied_price=implied,
+                profit_margin=margin,
+                confidence=conf,
+                detected_at=detected_at
+            )
+            for i, implied, margin, conf in zip(
+                indices.tolist(),
+                implied_price[indices].tolist(),
+                profit_margin[indices].tolist(),
+                confidence[indices].tolist()
+            )
+        ]
     
-    async def send_opportunities_to_analyzer(self, opportunities: List[OpportunityData]):
-        """Send discovered opportunities to Analyzer Agent"""
+    async def send_opportunities_to_analyzer(self, opportunities: List[OpportunityData],
+                                             now: Optional[float] = None) -> Optional[bytes]:
+        """Send discovered opportunities to Analyzer Agent as one encoded frame"""
         try:
-            message = {
+            # Opportunities travel as rows in OPPORTUNITY_FIELDS order rather than dicts
+            payload = _pack_message({
                 "type": "opportunities_detected",
                 "from": self.agent_address,
-                "timestamp": time.time(),
+                "timestamp": now if now is not None else time.time(),
+                "fields": OPPORTUNITY_FIELDS,
                 "opportunities": [
-                    {
-                        "market": opp.market,
-                        "market_odds": opp.market_odds,
-                        "oracle_price": opp.oracle_price,
-                        "implied_price": opp.implied_price,
-                        "profit_margin": opp.profit_margin,
-                        "confidence": opp.confidence,
-                        "detected_at": opp.detected_at
-                    }
+                    (opp.market, opp.market_odds, opp.oracle_price, opp.implied_price,
+                     opp.profit_margin, opp.confidence, opp.detected_at)
                     for opp in opportunities
                 ]
-            }
+            })
             
             # In production, send via Fetch.ai messaging protocol
             # For demo, log the message
-            print(f"Sending to Analyzer Agent: {json.dumps(message, indent=2)}")
+            logger.debug(
+                "Sending %d opportunities to Analyzer Agent (%d bytes)",
+                len(opportunities),
+                len(payload)
+            )
+            
+            return payload
             
         except Exception as e:
             print(f"Error sending opportunities to analyzer: {e}")
+            return None
 
 
 # Agent entry point for Agentverse deployment